@@ -1,5 +1,21 @@
 import streamlit as st
 
+# Hoisted once so renders share one parsed string instead of re-building
+# the inline style attribute per field. Injected on every run: Streamlit
+# drops elements that are not re-rendered, so the <style> node must be
+# emitted each rerun to survive.
+_MISSIONARY_INPUT_CSS = """
+<style>
+.missionary-input-field {
+    margin: 10px 0;
+    padding: 15px;
+    border: 1px solid #ddd;
+    border-radius: 8px;
+    background-color: #f9f9f9;
+}
+</style>
+"""
+
 
 class MissionaryInputField:
     def __init__(
@@ -18,17 +34,8 @@ class MissionaryInputField:
 
     def render(self):
         """Render the missionary input field with segmented control for title"""
-        st.markdown(
-            """
-        <div style="
-            margin: 10px 0;
-            padding: 15px;
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            background-color: #f9f9f9;
-        """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(_MISSIONARY_INPUT_CSS, unsafe_allow_html=True)
+        st.markdown('<div class="missionary-input-field">', unsafe_allow_html=True)
 
         # Create columns for side-by-side layout
         col1, col2 = st.columns([1, 3])  # 1:3 ratio for dropdown vs text input
@@ -57,7 +64,8 @@ class MissionaryInputField:
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # Return the combined full name
+        # Return the combined full name; strip once and reuse the result
+        name = name.strip() if name else ""
         if title and name:
             return f"{title} {name}"
         if title:
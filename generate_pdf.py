@@ -1,13 +1,25 @@
 """PDF generation helpers for the Missionary Meal Planner."""
 
-import base64
+from __future__ import annotations
+
+from functools import lru_cache
+import mmap
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from state_model import APPSTATE_ADAPTER, AppState
+from utils import b64decode, b64encode
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
-from jinja2 import Template
-from weasyprint import CSS, HTML
+    from jinja2 import Template
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
 
-from state_model import AppState
+# WeasyPrint and Jinja2 are imported lazily inside the render helpers:
+# WeasyPrint drags in cairo/pango/fontconfig bindings, and most reruns
+# never generate a PDF.
 
 _MEAL_PLANNER_CSS = """
 @page {
@@ -34,22 +46,134 @@ _MEAL_PLANNER_CSS = """
 """
 
 
+@lru_cache(maxsize=1)
+def _get_font_config() -> FontConfiguration:
+    """Return a shared font configuration so font lookups persist across renders."""
+
+    from weasyprint.text.fonts import FontConfiguration  # noqa: PLC0415
+
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=1)
+def _get_stylesheet() -> CSS:
+    """Return the parsed meal planner stylesheet, cached across calls."""
+
+    from weasyprint import CSS  # noqa: PLC0415
+
+    return CSS(string=_MEAL_PLANNER_CSS, font_config=_get_font_config())
+
+
+@lru_cache(maxsize=1)
+def _get_template(template_path: Path, _mtime_ns: int) -> Template:
+    """Return the compiled Jinja template, re-reading only when the file changes."""
+
+    from jinja2 import Template  # noqa: PLC0415
+
+    # trim_blocks/lstrip_blocks drop the whitespace runs around template
+    # tags, shrinking the HTML string WeasyPrint has to tokenize.
+    # autoescape=True rather than select_autoescape(): the template is
+    # compiled from a string, so there is no filename to select on, and
+    # names/phone numbers must not reach the HTML unescaped.
+    return Template(
+        template_path.read_text(encoding="utf-8"),
+        autoescape=True,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+
 def generate_meal_planner_pdf(app_state: AppState) -> bytes:
     """Render the missionary meal planner PDF for the provided application state."""
 
+    # Key the render cache on the serialized state so unchanged content
+    # skips the whole WeasyPrint layout pass.
+    return _render_pdf_cached(app_state.model_dump_json(exclude_none=False))
+
+
+@lru_cache(maxsize=4)
+def _render_pdf_cached(state_json: str) -> bytes:
+    """Do the actual template render and PDF layout for a state snapshot."""
+
+    from weasyprint import HTML  # noqa: PLC0415
+
+    app_state = AppState.model_validate_json(state_json)
+
     template_path = Path(__file__).resolve().parent / "templates" / "meal_planner.html"
     if not template_path.exists():
         raise FileNotFoundError
 
-    template = Template(template_path.read_text(encoding="utf-8"))
-    companionships_context = app_state.model_dump(exclude_none=False)[
-        "companionships_data"
-    ]
+    template = _get_template(template_path, template_path.stat().st_mtime_ns)
+    companionships_context = APPSTATE_ADAPTER.dump_python(
+        app_state, mode="json", exclude_none=False
+    )["companionships_data"]
 
-    html_content = template.render(companionships=companionships_context)
-    html_doc = HTML(string=html_content, base_url=str(template_path.parent))
+    photo_cache = _register_photos(companionships_context)
 
-    return html_doc.write_pdf(stylesheets=[CSS(string=_MEAL_PLANNER_CSS)])
+    html_content = template.render(companionships=companionships_context)
+    html_doc = HTML(
+        string=html_content,
+        base_url=str(template_path.parent),
+        url_fetcher=_make_photo_fetcher(photo_cache),
+    )
+
+    return html_doc.write_pdf(
+        stylesheets=[_get_stylesheet()], font_config=_get_font_config()
+    )
+
+
+def _register_photos(
+    companionships: list[dict[str, Any]],
+) -> dict[str, tuple[str, bytes]]:
+    """Swap inline photo data URIs for synthetic URLs backed by decoded bytes.
+
+    WeasyPrint would otherwise re-parse and base64-decode each data URI
+    during layout; handing it raw bytes through a ``url_fetcher`` does the
+    decode once here and keeps the rendered HTML string small.
+    """
+
+    photo_cache: dict[str, tuple[str, bytes]] = {}
+    for companionship_index, companionship in enumerate(companionships):
+        for missionary_index, missionary in enumerate(
+            companionship.get("missionaries", [])
+        ):
+            source = _resolve_photo_source(missionary.get("photo"))
+            if source is None:
+                missionary["photo"] = None
+                continue
+
+            header, separator, payload = source.partition(";base64,")
+            if not separator:
+                # Leave non-base64 sources (e.g. file paths) untouched.
+                missionary["photo"] = source
+                continue
+
+            url = f"photo://companionship/{companionship_index}/missionary/{missionary_index}"
+            photo_cache[url] = (header.removeprefix("data:"), b64decode(payload))
+            missionary["photo"] = url
+
+    return photo_cache
+
+
+def _make_photo_fetcher(
+    photo_cache: dict[str, tuple[str, bytes]],
+) -> Callable[[str], dict[str, Any]]:
+    """Build a WeasyPrint ``url_fetcher`` serving photos from memory."""
+
+    from weasyprint import default_url_fetcher  # noqa: PLC0415
+
+    def fetch(url: str) -> dict[str, Any]:
+        cached = photo_cache.get(url)
+        if cached is not None:
+            mime_type, data = cached
+            return {"mime_type": mime_type, "string": data}
+        # The template only references local/base64 resources; anything
+        # remote would stall the render on network latency.
+        if url.startswith(("http:", "https:")):
+            raise ValueError(f"Remote fetch blocked during PDF render: {url}")
+        return default_url_fetcher(url)
+
+    return fetch
 
 
 def pdf_bytes_to_base64(pdf_bytes: bytes) -> str:
@@ -61,7 +185,12 @@ def pdf_bytes_to_base64(pdf_bytes: bytes) -> str:
     if not pdf_bytes:
         return ""
 
-    return base64.b64encode(bytes(pdf_bytes)).decode("utf-8")
+    # b64encode accepts bytearray via the buffer protocol, so no copy needed.
+    return b64encode(pdf_bytes).decode("ascii")
+
+
+# Strings longer than this cannot be file paths, so skip the stat call.
+_MAX_PATH_LENGTH = 4096
 
 
 def _resolve_photo_source(photo: Any) -> str | None:  # noqa: PLR0911
@@ -70,24 +199,31 @@ def _resolve_photo_source(photo: Any) -> str | None:  # noqa: PLR0911
     if not photo:
         return None
 
-    if isinstance(photo, bytes):
-        return _encode_bytes_as_data_uri(photo)
-
     if isinstance(photo, str):
+        # Overwhelmingly common case: already a data URI produced by
+        # photo processing or localStorage restore. No syscalls needed.
         if photo.startswith("data:"):
             return photo
 
-        photo_path = Path(photo)
-        if photo_path.exists():
-            return _encode_file_as_data_uri(photo_path)
+        # Only strings that plausibly name a file warrant a stat call.
+        # The length cap does most of the filtering; "." and "\\" never
+        # appear in base64 payloads, but "/" is in the base64 alphabet,
+        # so it cannot discriminate and is deliberately not checked.
+        if len(photo) < _MAX_PATH_LENGTH and ("." in photo or "\\" in photo):
+            photo_path = Path(photo)
+            if photo_path.exists():
+                return _encode_file_as_data_uri(photo_path)
 
         try:
-            decoded = base64.b64decode(photo, validate=True)
+            decoded = b64decode(photo, validate=True)
         except (ValueError, TypeError):
             return None
         else:
             return _encode_bytes_as_data_uri(decoded)
 
+    if isinstance(photo, bytes):
+        return _encode_bytes_as_data_uri(photo)
+
     if isinstance(photo, Path) and photo.exists():
         return _encode_file_as_data_uri(photo)
 
@@ -97,11 +233,20 @@ def _resolve_photo_source(photo: Any) -> str | None:  # noqa: PLR0911
 def _encode_file_as_data_uri(path: Path) -> str:
     """Convert a file path to a PNG data URI."""
 
-    return _encode_bytes_as_data_uri(path.read_bytes())
+    # mmap hands b64encode a zero-copy buffer instead of materialising
+    # the whole file as a bytes object first.
+    with path.open("rb") as file_handle:
+        if path.stat().st_size == 0:
+            return _encode_bytes_as_data_uri(b"")
+
+        with mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            encoded = b64encode(mapped_file).decode("ascii")
+
+    return f"data:image/png;base64,{encoded}"
 
 
 def _encode_bytes_as_data_uri(data: bytes) -> str:
     """Encode raw bytes as a base64 PNG data URI."""
 
-    encoded = base64.b64encode(data).decode("utf-8")
+    encoded = b64encode(data).decode("ascii")
     return f"data:image/png;base64,{encoded}"
@@ -2,18 +2,18 @@
 
 from __future__ import annotations
 
-import base64
 import binascii
-import imghdr
 import json
 import re
 from typing import Any
 
+import orjson
 import streamlit as st
 from streamlit_js_eval import streamlit_js_eval
 import structlog
 
 from state_model import AppState
+from utils import b64decode
 
 # localStorage key for app data
 STORAGE_KEY = "app_data"
@@ -23,16 +23,16 @@ _PHOTO_DATA_URI_PATTERN = re.compile(
     r"^data:image/[a-zA-Z0-9]+;base64,[A-Za-z0-9+/=]+$"
 )
 
-# Mapping from image kind to MIME type
-_IMAGE_KIND_TO_MIME = {
-    "jpeg": "image/jpeg",
-    "jpg": "image/jpeg",
-    "png": "image/png",
-    "gif": "image/gif",
-    "bmp": "image/bmp",
-    "webp": "image/webp",
-    "tiff": "image/tiff",
-}
+# Magic-byte prefixes mapped to MIME types (WEBP is special-cased below)
+_MAGIC_BYTES_TO_MIME = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
 
 log = structlog.get_logger()
 
@@ -55,18 +55,22 @@ def get_app_state_from_local_storage() -> AppState | None | bool:
         json_string = streamlit_js_eval(
             js_expressions=js_expression, key="get_app_data"
         )
-        log.info("Retrieved app state from localStorage", json_string=json_string)
 
         if not json_string:
-            log.info("No app state found in localStorage", json_string=json_string)
+            log.info("No app state found in localStorage")
             return None
-        # Parse the JSON string
-        app_state_dict = json.loads(json_string)
-        log.info("Parsed app state from localStorage", app_state_dict=app_state_dict)
+        # Parse the JSON string; orjson is much faster on the large
+        # base64 photo strings embedded in the payload. Log sizes rather
+        # than the payload itself, which embeds base64 photos.
+        log.info("Retrieved app state from localStorage", size=len(json_string))
+        app_state_dict = orjson.loads(json_string)
 
         # Create and return AppState object
         app_state = AppState.model_validate(app_state_dict)
-        log.info("Created AppState object from localStorage", app_state=app_state)
+        log.info(
+            "Created AppState object from localStorage",
+            num_companionships=app_state.num_companionships,
+        )
 
         st.success("✅ Saved data restored!")
 
@@ -94,9 +98,16 @@ def save_app_state_to_local_storage(app_state: AppState) -> None:
         # Convert the AppState to a JSON string
         app_state_dict = app_state.model_dump_json(exclude_none=False)
 
-        # Save to localStorage
-        js_expression = f"localStorage.setItem('{STORAGE_KEY}', '{app_state_dict}')"
-        streamlit_js_eval(js_expressions=js_expression, key="save_app_data")
+        # Fire-and-forget write via a zero-height component. Unlike
+        # streamlit_js_eval there is no postMessage round trip back to
+        # Python, so saving does not trigger an extra rerun.
+        # json.dumps produces safely-quoted JS string literals, so quotes
+        # and backslashes in the payload cannot break out of the script.
+        script = (
+            "<script>localStorage.setItem("
+            f"{json.dumps(STORAGE_KEY)}, {json.dumps(app_state_dict)});</script>"
+        )
+        st.components.v1.html(script, height=0)
 
     except (TypeError, ValueError) as e:
         raise ValueError("Error serializing app state") from e
@@ -139,21 +150,26 @@ def _coerce_photo_value(value: Any) -> str | None:
         return stripped
 
     try:
-        decoded = base64.b64decode(stripped, validate=True)
+        decoded = b64decode(stripped, validate=True)
     except (binascii.Error, ValueError):
         return None
 
     mime_type = _guess_mime_type(decoded)
+    del decoded
     if mime_type is None:
         return None
 
-    encoded = base64.b64encode(decoded).decode("utf-8")
-    return f"data:{mime_type};base64,{encoded}"
+    # The stripped value already validated as base64, so reuse it as-is
+    # instead of paying for a decode/re-encode round trip.
+    return f"data:{mime_type};base64,{stripped}"
 
 
 def _guess_mime_type(data: bytes) -> str | None:
-    kind = imghdr.what(None, data)
-    if kind is None:
-        return None
+    for magic, mime_type in _MAGIC_BYTES_TO_MIME:
+        if data.startswith(magic):
+            return mime_type
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
 
-    return _IMAGE_KIND_TO_MIME.get(kind.lower())
+    return None
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-import base64
 from dataclasses import dataclass
 from functools import lru_cache
+import os
+from pathlib import Path
+import threading
 from typing import TYPE_CHECKING, Final
 
 import cv2
@@ -14,7 +16,7 @@ from PyFaceCrop.face_crop import get_haarcascade_path
 if TYPE_CHECKING:
     import streamlit as st
 
-from utils import guess_image_mime_type, read_uploaded_file_bytes
+from utils import b64encode, guess_image_mime_type, read_uploaded_file_bytes
 
 
 class PhotoProcessingError(Exception):
@@ -45,6 +47,30 @@ class ProcessedPhoto:
 _DEFAULT_PADDING: Final[int] = 240
 _FALLBACK_MIME: Final[str] = "image/jpeg"
 
+# Optional YuNet ONNX detector; much faster and more accurate than the
+# Haar cascades, but the model file is not vendored with the app.
+_YUNET_MODEL_ENV: Final[str] = "MEAL_PLANNER_YUNET_MODEL"
+_YUNET_MODEL_FILENAME: Final[str] = "face_detection_yunet_2023mar_int8.onnx"
+_YUNET_SCORE_THRESHOLD: Final[float] = 0.6
+
+# Haar detection cost scales with pixel count, so detect on a downscaled
+# copy; the crop is still taken from the full-resolution image.
+_DETECTION_MAX_DIM: Final[int] = 640
+
+# The crop is only ever shown as a small avatar, so bound its size and
+# compress harder; this shrinks localStorage writes and PDF embeds too.
+_CROP_MAX_DIM: Final[int] = 256
+
+# Uncropped uploads are still stored in session state and localStorage as
+# base64, so bound those too; 12 MP phone photos are ~40x this budget.
+MAX_PHOTO_DIM: Final[int] = 512
+_JPEG_ENCODE_PARAMS: Final[tuple[int, ...]] = (
+    cv2.IMWRITE_JPEG_QUALITY,
+    82,
+    cv2.IMWRITE_JPEG_OPTIMIZE,
+    1,
+)
+
 
 def process_uploaded_photo(
     uploaded_file: st.UploadedFile, *, padding: int = _DEFAULT_PADDING
@@ -63,10 +89,17 @@ def process_uploaded_photo(
     cropped_bytes = _crop_face_to_bytes(image, padding=max(padding, 0))
 
     if cropped_bytes is None:
-        payload = base64.b64encode(image_bytes).decode("utf-8")
+        bounded = _bound_image_to_jpeg(image)
+        if bounded is not None:
+            payload = b64encode(bounded).decode("ascii")
+            return ProcessedPhoto(
+                f"data:{_FALLBACK_MIME};base64,{payload}", _FALLBACK_MIME, False
+            )
+
+        payload = b64encode(image_bytes).decode("ascii")
         return ProcessedPhoto(f"data:{mime_type};base64,{payload}", mime_type, False)
 
-    payload = base64.b64encode(cropped_bytes).decode("utf-8")
+    payload = b64encode(cropped_bytes).decode("ascii")
     return ProcessedPhoto(
         f"data:{_FALLBACK_MIME};base64,{payload}",
         _FALLBACK_MIME,
@@ -74,6 +107,31 @@ def process_uploaded_photo(
     )
 
 
+def _bound_image_to_jpeg(image: np.ndarray) -> bytes | None:
+    """Downscale an oversized image and re-encode it as a compact JPEG.
+
+    Returns ``None`` for images already within ``MAX_PHOTO_DIM``, leaving
+    the caller to keep the original bytes and MIME type.
+    """
+
+    height, width = image.shape[:2]
+    largest_dim = max(height, width)
+    if largest_dim <= MAX_PHOTO_DIM:
+        return None
+
+    scale = MAX_PHOTO_DIM / largest_dim
+    resized = cv2.resize(
+        image,
+        (int(width * scale), int(height * scale)),
+        interpolation=cv2.INTER_AREA,
+    )
+
+    success, buffer = cv2.imencode(".jpg", resized, _JPEG_ENCODE_PARAMS)
+    if not success:  # pragma: no cover - depends on cv2 build
+        return None
+    return bytes(buffer)
+
+
 def _bytes_to_image(image_bytes: bytes) -> np.ndarray:
     array = np.frombuffer(image_bytes, dtype=np.uint8)
     if array.size == 0:
@@ -86,44 +144,127 @@ def _bytes_to_image(image_bytes: bytes) -> np.ndarray:
 
 
 def _crop_face_to_bytes(image: np.ndarray, padding: int) -> bytes | None:
+    face = _detect_face(image)
+    if face is None:
+        return None
+
+    x, y, w, h = face
+    start_x = max(x - padding, 0)
+    start_y = max(y - padding, 0)
+    end_x = min(x + w + padding, image.shape[1])
+    end_y = min(y + h + padding, image.shape[0])
+
+    cropped = image[start_y:end_y, start_x:end_x]
+
+    crop_height, crop_width = cropped.shape[:2]
+    largest_dim = max(crop_height, crop_width)
+    if largest_dim > _CROP_MAX_DIM:
+        scale = _CROP_MAX_DIM / largest_dim
+        cropped = cv2.resize(
+            cropped,
+            (int(crop_width * scale), int(crop_height * scale)),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    success, buffer = cv2.imencode(".jpg", cropped, _JPEG_ENCODE_PARAMS)
+    if success:
+        return bytes(buffer)
+
+    return None
+
+
+# The cached detector instances are stateful and not thread-safe:
+# YuNet's setInputSize/detect is a two-step sequence and concurrent
+# detectMultiScale calls corrupt cascade state. Photo-pool workers take
+# this lock around detection only; decode/resize/encode stay parallel.
+_DETECTION_LOCK = threading.Lock()
+
+
+def _detect_face(image: np.ndarray) -> tuple[int, int, int, int] | None:
+    detector = _load_yunet()
+    if detector is not None:
+        height, width = image.shape[:2]
+        with _DETECTION_LOCK:
+            detector.setInputSize((width, height))
+            _, faces = detector.detect(image)
+        if faces is None or len(faces) == 0:
+            return None
+
+        # Detections are sorted by score, so take the best one.
+        x, y, w, h = (int(value) for value in faces[0][:4])
+        return x, y, w, h
+
+    return _detect_face_haar(image)
+
+
+def _detect_face_haar(image: np.ndarray) -> tuple[int, int, int, int] | None:
     try:
-        face_cascade, eye_cascade = _load_classifiers()
+        face_cascade = _load_face_classifier()
     except cv2.error as exc:  # pragma: no cover - defensive
         raise CascadeLoadingError("Unable to initialise face detectors") from exc
 
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    faces = face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.3,
-        minNeighbors=5,
-        flags=cv2.CASCADE_SCALE_IMAGE,
-    )
+    largest_dim = max(gray.shape[:2])
+    if largest_dim > _DETECTION_MAX_DIM:
+        scale = _DETECTION_MAX_DIM / largest_dim
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        scale = 1.0
+        small = gray
+
+    with _DETECTION_LOCK:
+        faces = face_cascade.detectMultiScale(
+            small,
+            scaleFactor=1.3,
+            minNeighbors=6,
+            flags=cv2.CASCADE_SCALE_IMAGE,
+        )
 
-    for x, y, w, h in faces:
-        roi_gray = gray[y : y + h, x : x + w]
-        eyes = eye_cascade.detectMultiScale(roi_gray)
-        if len(eyes) == 0:
-            continue
+    if len(faces) == 0:
+        return None
 
-        start_x = max(x - padding, 0)
-        start_y = max(y - padding, 0)
-        end_x = min(x + w + padding, image.shape[1])
-        end_y = min(y + h + padding, image.shape[0])
+    # Pick the largest detection; the expected input is a single headshot.
+    x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
 
-        cropped = image[start_y:end_y, start_x:end_x]
-        success, buffer = cv2.imencode(".jpg", cropped)
-        if success:
-            return bytes(buffer)
+    if scale != 1.0:
+        inverse = 1.0 / scale
+        x = int(x * inverse)
+        y = int(y * inverse)
+        w = int(w * inverse)
+        h = int(h * inverse)
 
-    return None
+    return x, y, w, h
+
+
+@lru_cache(maxsize=1)
+def _load_yunet() -> cv2.FaceDetectorYN | None:
+    """Load the quantized YuNet detector if a model file is available."""
+
+    model_path = os.environ.get(_YUNET_MODEL_ENV)
+    if model_path is None:
+        candidate = Path(__file__).resolve().parent / "models" / _YUNET_MODEL_FILENAME
+        if candidate.exists():
+            model_path = str(candidate)
+
+    if model_path is None or not Path(model_path).exists():
+        return None
+
+    try:
+        return cv2.FaceDetectorYN.create(
+            model_path,
+            "",
+            (0, 0),
+            score_threshold=_YUNET_SCORE_THRESHOLD,
+        )
+    except cv2.error:  # pragma: no cover - depends on cv2 build
+        return None
 
 
 @lru_cache(maxsize=1)
-def _load_classifiers() -> tuple[cv2.CascadeClassifier, cv2.CascadeClassifier]:
+def _load_face_classifier() -> cv2.CascadeClassifier:
     try:
         face_path = get_haarcascade_path("haarcascade_frontalface_default.xml")
-        eye_path = get_haarcascade_path("haarcascade_eye.xml")
     except (
         FileNotFoundError,
         TypeError,
@@ -132,11 +273,8 @@ def _load_classifiers() -> tuple[cv2.CascadeClassifier, cv2.CascadeClassifier]:
         raise CascadeLoadingError("Unable to locate Haar cascade resources") from exc
 
     face_cascade = cv2.CascadeClassifier(face_path)
-    eye_cascade = cv2.CascadeClassifier(eye_path)
 
-    if (
-        face_cascade.empty() or eye_cascade.empty()
-    ):  # pragma: no cover - depends on cv2 data
+    if face_cascade.empty():  # pragma: no cover - depends on cv2 data
         raise CascadeLoadingError("Unable to load Haar cascade resources")
 
-    return face_cascade, eye_cascade
+    return face_cascade
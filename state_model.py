@@ -4,9 +4,9 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Annotated, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
-from utils import flatten_to_json_pointers, unflatten_from_json_pointers
+from utils import unflatten_from_json_pointers
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
@@ -22,6 +22,10 @@ PhotoDataUri = Annotated[
 DEFAULT_COMPANIONSHIP_COUNT = 6
 DEFAULT_MISSIONARIES_PER_COMPANIONSHIP = 2
 
+# Pointer key marking a payload as produced by to_session_state in this
+# process, letting from_session_state skip full re-validation.
+TRUSTED_SENTINEL_KEY = "_trusted"
+
 
 def _default_missionaries() -> list[Missionary]:
     """Return the default missionary collection for a companionship."""
@@ -63,15 +67,85 @@ class AppState(BaseModel):
     def to_session_state(self) -> dict[str, Any]:
         """Convert the model into a structure suitable for ``st.session_state``."""
 
-        return flatten_to_json_pointers(self.model_dump(exclude_none=False))
+        return _flatten_appstate(self)
 
     @classmethod
     def from_session_state(cls, session_state: Mapping[str, Any]) -> AppState:
         """Build an ``AppState`` instance from an existing ``st.session_state`` mapping."""
 
         payload: dict[str, Any] = unflatten_from_json_pointers(session_state)
+        if isinstance(payload, dict) and payload.pop(TRUSTED_SENTINEL_KEY, False):
+            return cls._construct_trusted(payload)
         return cls.model_validate(payload)
 
+    @classmethod
+    def _construct_trusted(cls, payload: dict[str, Any]) -> AppState:
+        """Rebuild the model without validation for in-process round trips.
+
+        Widget callbacks only ever write values that came out of
+        ``to_session_state`` (or widget-typed strings/ints), so type
+        coercion and constraint checks are redundant here.
+        """
+
+        companionships = [
+            Companionship.model_construct(
+                missionaries=[
+                    Missionary.model_construct(
+                        title=missionary.get("title", "Elder"),
+                        name=missionary.get("name", ""),
+                        # Deleting a photo leaves "" behind; store None.
+                        photo=missionary.get("photo") or None,
+                    )
+                    for missionary in companionship.get("missionaries", [])
+                ],
+                phone_number=companionship.get("phone_number", ""),
+                schedule=companionship.get("schedule", []),
+            )
+            for companionship in payload.get("companionships_data", [])
+        ]
+        return cls.model_construct(
+            num_companionships=payload.get(
+                "num_companionships", DEFAULT_COMPANIONSHIP_COUNT
+            ),
+            companionships_data=companionships,
+            missionary_counts=payload.get("missionary_counts", [2, 2, 2, 2]),
+            generated_pdf=payload.get("generated_pdf", ""),
+        )
+
+
+# Shared adapter so the compiled Rust serializer is built once at import
+# time rather than looked up per call.
+APPSTATE_ADAPTER = TypeAdapter(AppState)
+
+
+def _flatten_appstate(app_state: AppState) -> dict[str, Any]:
+    """Emit JSON-pointer keys by walking the model directly.
+
+    Fusing the field walk and the flatten pass avoids materializing the
+    intermediate nested dict that ``model_dump`` +
+    ``flatten_to_json_pointers`` would build.
+    """
+
+    result: dict[str, Any] = {"/num_companionships": app_state.num_companionships}
+
+    for companionship_index, companionship in enumerate(app_state.companionships_data):
+        prefix = f"/companionships_data/{companionship_index}"
+        for missionary_index, missionary in enumerate(companionship.missionaries):
+            missionary_prefix = f"{prefix}/missionaries/{missionary_index}"
+            result[f"{missionary_prefix}/title"] = missionary.title
+            result[f"{missionary_prefix}/name"] = missionary.name
+            result[f"{missionary_prefix}/photo"] = missionary.photo
+        result[f"{prefix}/phone_number"] = companionship.phone_number
+        for schedule_index, entry in enumerate(companionship.schedule):
+            result[f"{prefix}/schedule/{schedule_index}"] = entry
+
+    for count_index, count in enumerate(app_state.missionary_counts):
+        result[f"/missionary_counts/{count_index}"] = count
+
+    result["/generated_pdf"] = app_state.generated_pdf
+    result[f"/{TRUSTED_SENTINEL_KEY}"] = True
+    return result
+
 
 def create_companionship(missionary_count: int) -> Companionship:
     """Create a blank companionship with a specific number of missionaries."""
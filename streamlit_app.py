@@ -1,5 +1,10 @@
-import binascii
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
+from functools import lru_cache
+import hashlib
+import os
+import time
 
 import streamlit as st
 import structlog
@@ -9,9 +14,8 @@ from local_storage import (
     get_app_state_from_local_storage,
     save_app_state_to_local_storage,
 )
-from photo_processing import process_uploaded_photo
 from state_model import AppState
-from utils import is_valid_photo_data_uri, photo_data_uri_to_bytes
+from utils import is_valid_photo_data_uri
 
 
 class PhotoState(Enum):
@@ -20,21 +24,106 @@ class PhotoState(Enum):
     READY = auto()
 
 
+@lru_cache(maxsize=64)
+def _photo_data_uri_is_valid(photo_value: str) -> bool:
+    """Memoized validity check; reruns revalidate the same long strings."""
+
+    return is_valid_photo_data_uri(photo_value)
+
+
 def _get_photo_state(photo_value: object) -> PhotoState:
-    if not is_valid_photo_data_uri(photo_value):
+    if not isinstance(photo_value, str) or not _photo_data_uri_is_valid(photo_value):
         if isinstance(photo_value, str) and photo_value.strip():
             return PhotoState.INVALID
         return PhotoState.EMPTY
     return PhotoState.READY
 
 
+# Bounded cache of processed photos keyed by content hash, so re-uploads
+# of identical bytes (phones reuse filenames like image.jpg) skip the
+# decode/detect/encode pipeline entirely.
+_PHOTO_CACHE_MAX_ENTRIES = 8
+_PHOTO_FUTURE_KEY_PREFIX = "#photo_future"
+_processed_photo_cache: OrderedDict[str, str] = OrderedDict()
+
+
+@lru_cache(maxsize=1)
+def _get_photo_processor():
+    """Import photo processing lazily; it drags in OpenCV and NumPy."""
+
+    from photo_processing import process_uploaded_photo  # noqa: PLC0415
+
+    return process_uploaded_photo
+
+
+def _fingerprint_upload(uploaded_file) -> str:
+    return hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).hexdigest()
+
+
+def _cache_processed_photo(digest: str, data_uri: str) -> None:
+    _processed_photo_cache[digest] = data_uri
+    while len(_processed_photo_cache) > _PHOTO_CACHE_MAX_ENTRIES:
+        _processed_photo_cache.popitem(last=False)
+
+
 def handle_uploaded_photo(photo_path: str, uploaded_path: str) -> None:
     uploaded_file = st.session_state.get(uploaded_path)
     if uploaded_file is None:
         st.session_state[photo_path] = None
         return
-    processed = process_uploaded_photo(uploaded_file)
-    st.session_state[photo_path] = processed.data_uri
+
+    digest = _fingerprint_upload(uploaded_file)
+    cached_data_uri = _processed_photo_cache.get(digest)
+    if cached_data_uri is not None:
+        _processed_photo_cache.move_to_end(digest)
+        st.session_state[photo_path] = cached_data_uri
+        return
+
+    # Face detection and re-encoding take hundreds of ms on phone photos;
+    # run them off the callback and let the next rerun collect the result.
+    future = _get_photo_executor().submit(_get_photo_processor(), uploaded_file)
+    st.session_state[f"{_PHOTO_FUTURE_KEY_PREFIX}{photo_path}"] = (digest, future)
+
+
+def _poll_photo_futures() -> None:
+    """Collect finished photo-processing futures into session state."""
+
+    future_keys = [
+        key for key in st.session_state if key.startswith(_PHOTO_FUTURE_KEY_PREFIX)
+    ]
+    for key in future_keys:
+        digest, future = st.session_state[key]
+        if not future.done():
+            continue
+
+        photo_path = key.removeprefix(_PHOTO_FUTURE_KEY_PREFIX)
+        del st.session_state[key]
+        try:
+            processed = future.result()
+        except Exception as e:
+            st.warning(f"⚠️ Error processing photo: {e!s}")
+            continue
+
+        _cache_processed_photo(digest, processed.data_uri)
+        st.session_state[photo_path] = processed.data_uri
+
+    if any(key.startswith(_PHOTO_FUTURE_KEY_PREFIX) for key in st.session_state):
+        time.sleep(0.1)
+        st.rerun()
+
+
+# Static pieces of the photo preview markup; only the data URI and the
+# missionary number vary, so plain concatenation avoids rebuilding the
+# multi-line literal around a large payload on every rerun.
+_PHOTO_HTML_PARTS = (
+    "<div style='display: flex; align-items: center; justify-content: center; "
+    "padding: 0.25rem 0;'>"
+    '<img src="',
+    '" alt="Missionary ',
+    ' photo" style="width: 50px; height: 50px; max-width: 50px; '
+    "max-height: 50px; object-fit: cover; border-radius: 50%; "
+    'border: 2px solid #ddd;"/></div>',
+)
 
 
 def display_uploaded_photo(
@@ -44,9 +133,9 @@ def display_uploaded_photo(
     missionary_index: int,
     photo_state_key: str,
 ) -> None:
-    try:
-        photo_data_uri_to_bytes(base64_payload)
-    except (binascii.Error, ValueError):
+    # The memoized validity check already base64-decoded this exact
+    # string in _get_photo_state, so revalidation here is a dict lookup.
+    if not _photo_data_uri_is_valid(base64_payload):
         st.warning(
             "Saved photo data is invalid. Please upload a new image.",
             icon="⚠️",
@@ -54,23 +143,13 @@ def display_uploaded_photo(
         st.session_state[photo_state_key] = ""
         st.rerun()
 
-    photo_html = f"""
-    <div style='display: flex; align-items: center; justify-content: center; padding: 0.25rem 0;'>
-        <img
-            src="{base64_payload}"
-            alt="Missionary {missionary_index + 1} photo"
-            style="
-                width: 50px;
-                height: 50px;
-                max-width: 50px;
-                max-height: 50px;
-                object-fit: cover;
-                border-radius: 50%;
-                border: 2px solid #ddd;
-            "
-        />
-    </div>
-    """
+    photo_html = (
+        _PHOTO_HTML_PARTS[0]
+        + base64_payload
+        + _PHOTO_HTML_PARTS[1]
+        + str(missionary_index + 1)
+        + _PHOTO_HTML_PARTS[2]
+    )
     preview_col, delete_col = st.columns(2)
 
     with preview_col:
@@ -89,6 +168,38 @@ def display_uploaded_photo(
 log = structlog.get_logger()
 
 
+@st.cache_resource
+def _get_pdf_executor() -> ThreadPoolExecutor:
+    """Single worker that renders PDFs off the script-rerun thread."""
+
+    return ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource
+def _get_photo_executor() -> ThreadPoolExecutor:
+    """Workers that process uploaded photos off the on_change callback."""
+
+    # OpenCV releases the GIL during decode/detect, so a burst of fresh
+    # uploads scales with cores; cap it to keep memory bounded.
+    return ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+
+
+@st.cache_data(max_entries=4)
+def _encode_pdf(pdf_data: bytes) -> str:
+    """Memoize the base64 encode; PDF bytes only change on regeneration."""
+
+    return pdf_bytes_to_base64(pdf_data)
+
+
+# Titles broadcast to missionaries for each gender selection; every
+# tuple covers three missionaries so growing a companionship always
+# seeds the new slot's title.
+_TITLE_MAP = {
+    "Elders": ("Elder", "Elder", "Elder"),
+    "Sisters": ("Sister", "Sister", "Sister"),
+    "Elder and Sister": ("Elder", "Sister", "Elder"),
+}
+
 # Page configuration
 st.set_page_config(
     page_title="Missionary Meal Planner",
@@ -112,9 +223,11 @@ def main():
         # this is a one time check, so we indicate that we've done it
         st.session_state["#should_fetch_from_local_storage"] = False
         # OK, here we check if the session state is empty, if so, we create a default state
-        log.info("Found data in local storage", local_storage_data=local_storage_data)
-        for key, value in local_storage_data.to_session_state().items():
-            log.info("Setting session state", key=key, value=value)
+        restored_state = local_storage_data.to_session_state()
+        # Log keys only; values include base64 photo payloads that would
+        # otherwise be serialized into every restore log line.
+        log.info("Found data in local storage", keys=list(restored_state))
+        for key, value in restored_state.items():
             st.session_state[key] = value
 
     default_state = AppState.create_default()
@@ -132,14 +245,21 @@ def main():
         if key not in st.session_state:
             st.session_state[key] = value
 
+    # Drop keys for companionships beyond the configured count. Parsing the
+    # index out of the key is one comparison per key, and collecting the
+    # stale keys first avoids mutating session state mid-iteration.
+    num_companionships = st.session_state["/num_companionships"]
+    stale_keys = []
     for k in st.session_state:
-        if (k.startswith("/companionships_data")) and (
-            not any(
-                k.startswith(f"/companionships_data/{i}")
-                for i in range(st.session_state["/num_companionships"])
-            )
-        ):
-            del st.session_state[k]
+        if not k.startswith("/companionships_data/"):
+            continue
+        index_part = k.split("/", 3)[2]
+        if index_part.isdigit() and int(index_part) >= num_companionships:
+            stale_keys.append(k)
+    for k in stale_keys:
+        del st.session_state[k]
+
+    _poll_photo_futures()
 
     st.title("🍽️ Missionary Meal Planner")
 
@@ -174,100 +294,13 @@ def main():
 
     # Input forms for each companionship
     for companionship_index in range(st.session_state["/num_companionships"]):
-        st.subheader(f"Companionship {companionship_index + 1}")
-
-        companionship_config_cols = st.columns(2)
-        with companionship_config_cols[0]:
-            missionary_count = st.segmented_control(
-                f"Number of Missionaries in Companionship {companionship_index + 1}",
-                options=[2, 3],
-                default=2,
-                key=f"/missionary_counts/{companionship_index}",
-            )
-        with companionship_config_cols[1]:
-            gender_of_companionship = st.segmented_control(
-                f"Gender of Companionship {companionship_index + 1}",
-                options=["Elders", "Sisters", "Elder and Sister"],
-                default="Elders",
-                selection_mode="single",
-                key=f"#component/companionships_data/{companionship_index}/missionaries/*/title",
-            )
-            match gender_of_companionship:
-                case "Elders":
-                    for i in range(missionary_count):
-                        st.session_state[
-                            f"/companionships_data/{companionship_index}/missionaries/{i}/title"
-                        ] = "Elder"
-                case "Sisters":
-                    for i in range(missionary_count):
-                        st.session_state[
-                            f"/companionships_data/{companionship_index}/missionaries/{i}/title"
-                        ] = "Sister"
-                case "Elder and Sister":
-                    st.session_state[
-                        f"/companionships_data/{companionship_index}/missionaries/0/title"
-                    ] = "Elder"
-                    st.session_state[
-                        f"/companionships_data/{companionship_index}/missionaries/1/title"
-                    ] = "Sister"
-
-        st.text_input(
-            f"Phone Number for Companionship {companionship_index + 1}",
-            key=f"/companionships_data/{companionship_index}/phone_number",
-            placeholder="07800 314 ...",
-        )
-
-        # Missionary inputs
-        for missionary_index in range(missionary_count):
-            # Photo upload
-            photo_path = f"/companionships_data/{companionship_index}/missionaries/{missionary_index}/photo"
-            uploader_key = f"#file_uploader/companionships_data/{companionship_index}/missionaries/{missionary_index}/photo"
-
-            photo_status = _get_photo_state(st.session_state.get(photo_path))
-
-            name_col, photo_col = st.columns(2)
-
-            with name_col:
-                st.text_input(
-                    st.session_state[
-                        f"/companionships_data/{companionship_index}/missionaries/{missionary_index}/title"
-                    ],
-                    key=f"/companionships_data/{companionship_index}/missionaries/{missionary_index}/name",
-                    placeholder="Missionary last name (e.g. Smith)",
-                )
-
-            with photo_col:
-                if photo_status is PhotoState.READY:
-                    display_uploaded_photo(
-                        base64_payload=st.session_state[photo_path],
-                        companionship_index=companionship_index,
-                        missionary_index=missionary_index,
-                        photo_state_key=photo_path,
-                    )
-                else:
-                    if photo_status is PhotoState.INVALID:
-                        st.warning(
-                            "Saved photo data is invalid. Please upload a new image.",
-                            icon="⚠️",
-                        )
-                        st.session_state[photo_path] = None
-
-                    def _on_change(
-                        photo_path: str = photo_path, uploader_key: str = uploader_key
-                    ):
-                        handle_uploaded_photo(photo_path, uploader_key)
-
-                    st.file_uploader(
-                        f"Photo for Missionary {missionary_index + 1} (optional)",
-                        type=["png", "jpg", "jpeg", "gif", "webp"],
-                        help="Upload a clear photo of the missionary",
-                        key=uploader_key,
-                        on_change=_on_change,
-                    )
+        _render_companionship(companionship_index)
 
     if st.button("🍽️ Generate Meal Planner", type="primary", width="stretch"):
         generate_meal_planner()
 
+    _collect_generated_pdf()
+
     # Display generated PDF if available
     if st.session_state["/generated_pdf"] is not None:
         st.subheader("📋 Generated Meal Planner")
@@ -282,19 +315,133 @@ def main():
                 width="stretch",
             )
 
-        # Display the PDF using an iframe
-        pdf_html = f"""
-        <iframe src="data:application/pdf;base64,{st.session_state["/generated_pdf"]}"
-                width="100%"
-                height="600"
-                style="border: none;">
-        </iframe>
-        """
-        st.components.v1.html(pdf_html, height=600)
+        if st.session_state["#generated_pdf_bytes"] is not None:
+            # st.pdf serves the raw bytes through the media manager, so
+            # no base64 ever crosses the websocket for the preview.
+            st.pdf(st.session_state["#generated_pdf_bytes"], height=600)
+        else:
+            # Restored sessions only carry the base64 string; decode it
+            # into a blob: URL so the browser parses the PDF bytes once
+            # instead of re-parsing an inline data: URI on every repaint.
+            pdf_html = f"""
+            <iframe id="pdf-viewer" width="100%" height="600" style="border: none;"></iframe>
+            <script>
+                const pdfBytes = Uint8Array.from(
+                    atob("{st.session_state["/generated_pdf"]}"), (c) => c.charCodeAt(0)
+                );
+                const pdfBlob = new Blob([pdfBytes], {{ type: "application/pdf" }});
+                document.getElementById("pdf-viewer").src = URL.createObjectURL(pdfBlob);
+            </script>
+            """
+            st.components.v1.html(pdf_html, height=600)
+
+
+@st.fragment
+def _render_companionship(companionship_index: int) -> None:
+    """Render one companionship's form, scoped so its widgets rerun alone.
+
+    Interacting with an uploader or input here only re-executes this
+    fragment, not the whole script with every other companionship.
+    """
+
+    # Futures submitted by this fragment's uploaders are collected here
+    # too, since a fragment rerun skips the poll in main().
+    _poll_photo_futures()
+
+    st.subheader(f"Companionship {companionship_index + 1}")
+
+    companionship_config_cols = st.columns(2)
+    with companionship_config_cols[0]:
+        missionary_count = st.segmented_control(
+            f"Number of Missionaries in Companionship {companionship_index + 1}",
+            options=[2, 3],
+            default=2,
+            key=f"/missionary_counts/{companionship_index}",
+        )
+    with companionship_config_cols[1]:
+        gender_of_companionship = st.segmented_control(
+            f"Gender of Companionship {companionship_index + 1}",
+            options=["Elders", "Sisters", "Elder and Sister"],
+            default="Elders",
+            selection_mode="single",
+            key=f"#component/companionships_data/{companionship_index}/missionaries/*/title",
+        )
+        # Only broadcast titles when the selection or missionary count
+        # changed; rewriting them on every rerun churns session state for
+        # no reason. The count is part of the key because growing a
+        # companionship must seed the new missionary's title too.
+        prev_gender_key = f"#prev_gender/{companionship_index}"
+        gender_state = (gender_of_companionship, missionary_count)
+        if st.session_state.get(prev_gender_key) != gender_state:
+            st.session_state[prev_gender_key] = gender_state
+            titles = _TITLE_MAP.get(gender_of_companionship, ())
+            for i, title in enumerate(titles[:missionary_count]):
+                st.session_state[
+                    f"/companionships_data/{companionship_index}/missionaries/{i}/title"
+                ] = title
+
+    st.text_input(
+        f"Phone Number for Companionship {companionship_index + 1}",
+        key=f"/companionships_data/{companionship_index}/phone_number",
+        placeholder="07800 314 ...",
+    )
+
+    # Missionary inputs
+    for missionary_index in range(missionary_count):
+        # Build each pointer key from one shared base rather than
+        # re-formatting the full path five times per missionary.
+        missionary_base = (
+            f"/companionships_data/{companionship_index}"
+            f"/missionaries/{missionary_index}"
+        )
+        photo_path = missionary_base + "/photo"
+        title_path = missionary_base + "/title"
+        name_path = missionary_base + "/name"
+        uploader_key = "#file_uploader" + photo_path
+
+        photo_status = _get_photo_state(st.session_state.get(photo_path))
+
+        name_col, photo_col = st.columns(2)
+
+        with name_col:
+            st.text_input(
+                st.session_state[title_path],
+                key=name_path,
+                placeholder="Missionary last name (e.g. Smith)",
+            )
+
+        with photo_col:
+            if photo_status is PhotoState.READY:
+                display_uploaded_photo(
+                    base64_payload=st.session_state[photo_path],
+                    companionship_index=companionship_index,
+                    missionary_index=missionary_index,
+                    photo_state_key=photo_path,
+                )
+            else:
+                if photo_status is PhotoState.INVALID:
+                    st.warning(
+                        "Saved photo data is invalid. Please upload a new image.",
+                        icon="⚠️",
+                    )
+                    st.session_state[photo_path] = None
+
+                def _on_change(
+                    photo_path: str = photo_path, uploader_key: str = uploader_key
+                ):
+                    handle_uploaded_photo(photo_path, uploader_key)
+
+                st.file_uploader(
+                    f"Photo for Missionary {missionary_index + 1} (optional)",
+                    type=["png", "jpg", "jpeg", "gif", "webp"],
+                    help="Upload a clear photo of the missionary",
+                    key=uploader_key,
+                    on_change=_on_change,
+                )
 
 
 def generate_meal_planner():
-    """Generate the meal planner image using WeasyPrint"""
+    """Kick off meal planner generation on the background worker."""
 
     try:
         app_state = AppState.from_session_state(
@@ -303,14 +450,40 @@ def generate_meal_planner():
 
         save_app_state_to_local_storage(app_state)
 
-        pdf_data: bytes = generate_meal_planner_pdf(app_state)
-        st.session_state["#generated_pdf_bytes"] = pdf_data
-        st.session_state["/generated_pdf"] = pdf_bytes_to_base64(pdf_data)
+        # WeasyPrint is CPU-bound and can take seconds; rendering on the
+        # worker keeps the rerun loop responsive while we poll below.
+        st.session_state["#pdf_future"] = _get_pdf_executor().submit(
+            generate_meal_planner_pdf, app_state
+        )
 
-        st.success("✅ Meal planner generated successfully!")
+    except Exception as e:
+        st.error(f"❌ Error generating meal planner: {e!s}")
 
+
+def _collect_generated_pdf() -> None:
+    """Poll the in-flight PDF future and publish the result when ready."""
+
+    future = st.session_state.get("#pdf_future")
+    if future is None:
+        return
+
+    if not future.done():
+        with st.status("Generating meal planner...", expanded=False):
+            time.sleep(0.2)
+        st.rerun()
+
+    st.session_state["#pdf_future"] = None
+    try:
+        pdf_data: bytes = future.result()
     except Exception as e:
         st.error(f"❌ Error generating meal planner: {e!s}")
+    else:
+        st.session_state["#generated_pdf_bytes"] = pdf_data
+        st.session_state["/generated_pdf"] = _encode_pdf(pdf_data)
+        st.success("✅ Meal planner generated successfully!")
+
+
+_KNOWN_TITLES = frozenset({"Elder", "Sister"})
 
 
 def split_full_name(value: str) -> tuple[str, str]:
@@ -323,12 +496,9 @@ def split_full_name(value: str) -> tuple[str, str]:
     if not trimmed:
         return "Elder", ""
 
-    parts = trimmed.split(" ", 1)
-    potential_title = parts[0]
-    if potential_title in {"Elder", "Sister"}:
-        title = potential_title
-        remainder = parts[1] if len(parts) > 1 else ""
-        return title, remainder.strip()
+    potential_title, _, remainder = trimmed.partition(" ")
+    if potential_title in _KNOWN_TITLES:
+        return potential_title, remainder.strip()
 
     return "Elder", trimmed
 
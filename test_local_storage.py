@@ -77,20 +77,17 @@ class TestSaveAppStateToLocalStorage:
         """Test successfully saving app state to localStorage."""
         app_state = AppState(num_companionships=3, companionships_data=[])
 
-        with patch("local_storage.streamlit_js_eval") as mock_js_eval:
+        with patch("local_storage.st") as mock_st:
             save_app_state_to_local_storage(app_state)
 
-            # Check that the data was properly serialized and escaped
-            call_kwargs = mock_js_eval.call_args[1]
-            actual_js_expression = call_kwargs["js_expressions"]
+            # Check that the data was properly serialized into the script
+            mock_st.components.v1.html.assert_called_once()
+            script = mock_st.components.v1.html.call_args[0][0]
             expected_json = app_state.model_dump_json(exclude_none=False)
-            expected_js_expression = (
-                f"localStorage.setItem('{STORAGE_KEY}', '{expected_json}')"
-            )
 
-            assert actual_js_expression == expected_js_expression
-            mock_js_eval.assert_called_once()
-            assert call_kwargs["key"] == "save_app_data"
+            assert f"localStorage.setItem({json.dumps(STORAGE_KEY)}" in script
+            assert json.dumps(expected_json) in script
+            assert mock_st.components.v1.html.call_args[1]["height"] == 0
 
     def test_save_app_state_with_special_characters(self):
         """Test saving app state with special characters that need escaping."""
@@ -103,24 +100,19 @@ class TestSaveAppStateToLocalStorage:
         companionship = Companionship(missionaries=missionaries)
         app_state = AppState(companionships_data=[companionship])
 
-        with patch("local_storage.streamlit_js_eval") as mock_js_eval:
+        with patch("local_storage.st") as mock_st:
             save_app_state_to_local_storage(app_state)
 
-            call_kwargs = mock_js_eval.call_args[1]
-            actual_js_expression = call_kwargs["js_expressions"]
-            # The JSON should contain the special characters properly escaped for JavaScript
-            # model_dump_json() handles escaping differently than json.dumps()
-            assert (
-                "O'Connor" in actual_js_expression
-            )  # Should be properly escaped in the JSON
-            assert (
-                "Smith's" in actual_js_expression
-            )  # Should be properly escaped in the JSON
+            script = mock_st.components.v1.html.call_args[0][0]
+            # The payload is double-encoded into a JS string literal, so the
+            # inner JSON quotes appear backslash-escaped in the script
+            assert "O'Connor" in script
+            assert "Smith's" in script
             # Also check that the JSON structure is correct
-            assert '"companionships_data"' in actual_js_expression
-            assert '"missionaries"' in actual_js_expression
-            assert '"name"' in actual_js_expression
-            assert '"title"' in actual_js_expression
+            assert '\\"companionships_data\\"' in script
+            assert '\\"missionaries\\"' in script
+            assert '\\"name\\"' in script
+            assert '\\"title\\"' in script
 
     def test_save_app_state_serialization_error(self):
         """Test when app state cannot be serialized."""
@@ -132,12 +124,12 @@ class TestSaveAppStateToLocalStorage:
             with pytest.raises(ValueError, match="Error saving data to localStorage"):
                 save_app_state_to_local_storage(app_state)
 
-    def test_save_app_state_js_eval_exception(self):
-        """Test when streamlit_js_eval raises an exception during save."""
+    def test_save_app_state_component_exception(self):
+        """Test when the component bridge raises an exception during save."""
         app_state = AppState(num_companionships=2)
 
-        with patch("local_storage.streamlit_js_eval") as mock_js_eval:
-            mock_js_eval.side_effect = Exception("Storage quota exceeded")
+        with patch("local_storage.st") as mock_st:
+            mock_st.components.v1.html.side_effect = Exception("Storage quota exceeded")
 
             with pytest.raises(ValueError, match="Error saving data to localStorage"):
                 save_app_state_to_local_storage(app_state)
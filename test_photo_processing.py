@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import base64
-from io import BytesIO
+from binascii import a2b_base64
 from pathlib import Path
 
 import cv2
@@ -17,32 +17,59 @@ from photo_processing import (
 
 
 class MockUpload:
+    """Minimal stand-in for an uploaded file; slicing beats a BytesIO here."""
+
+    __slots__ = ("_data", "_pos", "name", "type")
+
     def __init__(
         self, data: bytes, *, mime_type: str, name: str = "upload.jpg"
     ) -> None:
-        self._buffer = BytesIO(data)
+        self._data = data
+        self._pos = 0
         self.type = mime_type
         self.name = name
 
     def read(self) -> bytes:
-        return self._buffer.read()
+        data = self._data[self._pos :]
+        self._pos = len(self._data)
+        return data
 
     def seek(self, position: int) -> None:
-        self._buffer.seek(position)
+        self._pos = position
+
+
+# Pre-encoded 8x8 black PNG; the no-face test only cares that the bytes
+# round-trip unchanged, so there is no need to run the PNG encoder.
+BLANK_PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x08\x00\x00\x00\x08"
+    b"\x08\x02\x00\x00\x00Km)\xdc\x00\x00\x00\x1dIDAT\x08\x1du\xc1\x01\x01"
+    b"\x00\x00\x00@ \xfe\x9f\xb6@\xc9\x90!C\x86\x0c\x192d\x04\x04L\x00\t"
+    b"\xf6\xbbt\x05\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+EXPECTED_BLANK_URI = "data:image/png;base64," + base64.b64encode(BLANK_PNG).decode(
+    "ascii"
+)
 
 
-def _encode_image(image: np.ndarray, *, ext: str) -> bytes:
-    success, buffer = cv2.imencode(ext, image)
-    assert success
-    return bytes(buffer)
+_FACE_ASSET = Path("face_example.jpg")
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def sample_face_bytes() -> bytes:
-    return Path("face_example.jpg").read_bytes()
+    return _FACE_ASSET.read_bytes()
+
+
+# Shared read-only detection results handed back by DummyCascade.
+_FACES = np.array([[10, 20, 30, 40]], dtype=np.int32)
+_FACES.setflags(write=False)
+_NO_DETECTIONS = np.empty((0, 4), dtype=np.int32)
+_NO_DETECTIONS.setflags(write=False)
 
 
 class DummyCascade:
+    __slots__ = ("_detections",)
+
     def __init__(self, detections: np.ndarray) -> None:
         self._detections = detections
 
@@ -50,18 +77,21 @@ class DummyCascade:
         return self._detections
 
 
+# The cascades are stateless, so one instance of each serves every test.
+_FACE_CASCADE = DummyCascade(_FACES)
+_EMPTY_CASCADE = DummyCascade(_NO_DETECTIONS)
+
+
+@pytest.mark.skipif(not _FACE_ASSET.exists(), reason="face_example.jpg missing")
 def test_process_uploaded_photo_crops_face(
     sample_face_bytes: bytes, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     upload = MockUpload(sample_face_bytes, mime_type="image/jpeg", name="face.jpg")
 
-    faces = np.array([[10, 20, 30, 40]], dtype=np.int32)
-    eyes = np.array([[5, 5, 10, 10]], dtype=np.int32)
-
     monkeypatch.setattr(
         photo_processing,
-        "_load_classifiers",
-        lambda: (DummyCascade(faces), DummyCascade(eyes)),
+        "_load_face_classifier",
+        lambda: _FACE_CASCADE,
     )
 
     result = process_uploaded_photo(upload, padding=0)
@@ -71,37 +101,42 @@ def test_process_uploaded_photo_crops_face(
     assert result.mime_type == "image/jpeg"
     assert result.data_uri.startswith("data:image/jpeg;base64,")
 
-    encoded_bytes = base64.b64decode(result.data_uri.split(",", 1)[1])
+    # Detection runs on a downscaled copy, so the mocked cascade box is
+    # mapped back to full resolution before cropping.
+    source = cv2.imdecode(
+        np.frombuffer(sample_face_bytes, dtype=np.uint8), cv2.IMREAD_COLOR
+    )
+    inverse = 1.0 / (
+        photo_processing._DETECTION_MAX_DIM / max(source.shape[:2])  # noqa: SLF001
+    )
+    expected_shape = (int(40 * inverse), int(30 * inverse))
+
+    encoded_bytes = a2b_base64(result.data_uri[result.data_uri.index(",") + 1 :])
     decoded = cv2.imdecode(
         np.frombuffer(encoded_bytes, dtype=np.uint8), cv2.IMREAD_COLOR
     )
     assert decoded is not None
-    assert decoded.shape[:2] == (40, 30)
+    assert decoded.shape[:2] == expected_shape
 
 
 def test_process_uploaded_photo_returns_original_when_no_face_detected(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    blank = np.zeros((200, 200, 3), dtype=np.uint8)
-    blank_bytes = _encode_image(blank, ext=".png")
-    upload = MockUpload(blank_bytes, mime_type="image/png", name="blank.png")
+    upload = MockUpload(BLANK_PNG, mime_type="image/png", name="blank.png")
 
     monkeypatch.setattr(
         photo_processing,
-        "_load_classifiers",
-        lambda: (
-            DummyCascade(np.empty((0, 4), dtype=np.int32)),
-            DummyCascade(np.empty((0, 4), dtype=np.int32)),
-        ),
+        "_load_face_classifier",
+        lambda: _EMPTY_CASCADE,
     )
 
     result = process_uploaded_photo(upload)
 
     assert result.cropped is False
     assert result.mime_type == "image/png"
-    assert result.data_uri.startswith("data:image/png;base64,")
-    decoded = base64.b64decode(result.data_uri.split(",", 1)[1])
-    assert decoded == blank_bytes
+    # String equality against the precomputed URI replaces a base64
+    # decode round trip per run.
+    assert result.data_uri == EXPECTED_BLANK_URI
 
 
 def test_process_uploaded_photo_rejects_non_image() -> None:
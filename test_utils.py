@@ -239,6 +239,17 @@ class TestUnflattenFromJsonPointers:
         ]
         assert result == expected
 
+    def test_unflatten_list_with_mixed_key_dict(self):
+        """Test a list root whose element mixes digit and non-digit keys."""
+        flat_data = {
+            "/0/b": 1,
+            "/0/1/0": True,
+        }
+        result = unflatten_from_json_pointers(flat_data)
+
+        expected = [{"b": 1, "1": [True]}]
+        assert result == expected
+
     def test_unflatten_empty_dict(self):
         """Test unflattening an empty dict."""
         flat_data = {}
@@ -2,16 +2,33 @@
 
 from __future__ import annotations
 
-import base64
 import binascii
 import contextlib
+from functools import lru_cache
 from pathlib import Path
 import re
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     import streamlit as st
 
+try:
+    # pybase64 ships SIMD-accelerated codecs with the same signatures.
+    from pybase64 import b64decode, b64encode
+except ImportError:  # pragma: no cover - optional accelerator
+    from base64 import b64decode, b64encode
+
+# JSON Pointer (RFC 6901) escape/unescape tables. Almost all keys are
+# plain field names, and re.sub returns the original string by identity
+# when the pattern finds nothing, so the common case allocates nothing
+# (str.translate always builds a new string).
+_POINTER_ESCAPE_PATTERN = re.compile(r"[~/]")
+_POINTER_ESCAPE_MAP = {"~": "~0", "/": "~1"}
+_POINTER_UNESCAPE_PATTERN = re.compile(r"~[01]")
+_POINTER_UNESCAPE_MAP = {"~0": "~", "~1": "/"}
+
 
 def flatten_to_json_pointers(
     data: dict[str, Any] | list[Any], parent_path: str = "/"
@@ -19,13 +36,13 @@ def flatten_to_json_pointers(
     """
     Flatten a nested dict or list into a flat dictionary with JSON pointer keys.
 
-    This function recursively traverses nested data structures and creates a flat
+    This function traverses nested data structures and creates a flat
     dictionary where each key is a JSON Pointer (RFC 6901) to the original location
     of the value, and the value is the primitive value itself.
 
     Args:
         data: The nested dict or list structure to flatten
-        parent_path: The current JSON pointer path (used internally for recursion)
+        parent_path: The JSON pointer prefix for the emitted keys
 
     Returns:
         A flat dictionary with JSON pointer keys and primitive values
@@ -38,35 +55,68 @@ def flatten_to_json_pointers(
         >>> flatten_to_json_pointers([1, 2, {"nested": True}])
         {'/0': 1, '/1': 2, '/2/nested': True}
     """
-    result: dict[str, Any] = {}
-
-    if isinstance(data, dict):
-        for key, value in data.items():
-            # Escape special characters in key for JSON Pointer compliance
-            escaped_key = str(key).replace("~", "~0").replace("/", "~1")
-            current_path = f"{parent_path}{escaped_key}"
-
-            if isinstance(value, dict | list):
-                # Recursively flatten nested structures
-                nested_result = flatten_to_json_pointers(value, f"{current_path}/")
-                result.update(nested_result)
-            else:
-                # Add primitive value to result
-                result[current_path] = value
+    return dict(flatten_iter(data, parent_path))
 
-    elif isinstance(data, list):
-        for index, item in enumerate(data):
-            current_path = f"{parent_path}{index}"
 
-            if isinstance(item, dict | list):
-                # Recursively flatten nested structures
-                nested_result = flatten_to_json_pointers(item, f"{current_path}/")
-                result.update(nested_result)
-            else:
-                # Add primitive value to result
-                result[current_path] = item
+def flatten_iter(
+    data: dict[str, Any] | list[Any], parent_path: str = "/"
+) -> Iterator[tuple[str, Any]]:
+    """
+    Lazily yield (JSON pointer, value) pairs for a nested dict or list.
 
-    return result
+    Streaming consumers (e.g. serializing straight to a sink) can iterate
+    the pairs with O(depth) peak memory instead of materializing the full
+    flat dict that :func:`flatten_to_json_pointers` builds.
+
+    Args:
+        data: The nested dict or list structure to flatten
+        parent_path: The JSON pointer prefix for the emitted keys
+
+    Yields:
+        (pointer, value) pairs for every primitive leaf in the structure
+    """
+    # An explicit stack avoids one interpreter frame per nested container
+    # and the recursion limit on deep inputs. One shared segments buffer
+    # is appended to on descent and popped on ascent (a None frame marks
+    # where a subtree ends), so no per-container path copy is allocated;
+    # the prefix string is joined once per container, not per leaf.
+    segments: list[str] = []
+    stack: list[tuple[str | None, dict[str, Any] | list[Any]] | None] = [(None, data)]
+
+    while stack:
+        frame = stack.pop()
+        if frame is None:
+            segments.pop()
+            continue
+
+        segment, node = frame
+        if segment is not None:
+            segments.append(segment)
+            stack.append(None)
+
+        prefix = parent_path + "/".join(segments) + "/" if segments else parent_path
+
+        if isinstance(node, dict):
+            for key, value in node.items():
+                # Escape special characters in key for JSON Pointer compliance
+                escaped_key = _POINTER_ESCAPE_PATTERN.sub(
+                    lambda match: _POINTER_ESCAPE_MAP[match.group(0)], str(key)
+                )
+
+                # Exact type checks: the data is deserialized JSON, which
+                # only ever contains plain dicts and lists, and `type(x) is`
+                # skips the subclass machinery isinstance pays for.
+                if type(value) is dict or type(value) is list:
+                    stack.append((escaped_key, value))
+                else:
+                    yield prefix + escaped_key, value
+
+        elif isinstance(node, list):
+            for index, item in enumerate(node):
+                if type(item) is dict or type(item) is list:
+                    stack.append((str(index), item))
+                else:
+                    yield prefix + str(index), item
 
 
 def unflatten_from_json_pointers(
@@ -101,107 +151,144 @@ def unflatten_from_json_pointers(
     if not flat_dict:
         return {}
 
-    # Group paths by their structure to determine the root type
-    root_paths = {}
-    max_depth = 0
+    # Parse every pointer exactly once; the parsed parts feed both the
+    # root-type decision and the structure build below, instead of being
+    # recomputed per pass.
+    parsed: list[tuple[tuple[tuple[str, int | None], ...], Any]] = []
+    all_numeric_roots = True
+    root_value: Any = None
+    has_root_value = False
 
-    for pointer in flat_dict:
-        # Parse the JSON pointer path
+    for pointer, value in flat_dict.items():
         path_parts = _parse_json_pointer(pointer)
-        root_paths[pointer] = path_parts
-        max_depth = max(max_depth, len(path_parts))
-
-    if not root_paths:
-        return {}
-
-    # Determine if root should be a dict or list
-    # Check if all root segments are numeric (indicating a list)
-    root_segments = set()
-    for path_parts in root_paths.values():
         if path_parts:
-            root_segments.add(path_parts[0])
+            # Track the root type with a flag instead of collecting the
+            # segments into sets and comparing cardinalities afterwards.
+            if path_parts[0][1] is None:
+                all_numeric_roots = False
+            parsed.append((path_parts, value))
+        elif not has_root_value:
+            # Root pointer "/" - its value represents the entire structure
+            root_value = value
+            has_root_value = True
+
+    # If all root segments are numeric, it's likely a list
+    if parsed and all_numeric_roots:
+        # Sort so root indices arrive in order and the list grows by
+        # append, instead of preallocating [None] * N and overwriting
+        # slots. Only the root index participates: the sort must stay
+        # stable within each element so a dict mixing digit and
+        # non-digit keys is built in insertion order and not mistaken
+        # for a nested list.
+        parsed.sort(key=_root_index_key)
+        result = []
+
+        for path_parts, value in parsed:
+            index = path_parts[0][1]
+            remaining_path = path_parts[1:]
+
+            if index >= len(result):
+                # New index: fill any sparse gap, then append directly.
+                result.extend([None] * (index - len(result)))
+                result.append(
+                    value
+                    if not remaining_path
+                    else _create_nested_structure(remaining_path, value)
+                )
+            elif not remaining_path:
+                # Direct value at this index
+                result[index] = value
+            # Nested structure at this index
+            elif result[index] is None:
+                result[index] = _create_nested_structure(remaining_path, value)
+            else:
+                _set_nested_value(result[index], remaining_path, value)
 
-    # If all root segments are numeric strings, it's likely a list
-    try:
-        numeric_segments = {int(seg) for seg in root_segments if seg.isdigit()}
-        if numeric_segments and len(numeric_segments) == len(root_segments):
-            # It's a list - find the maximum index
-            max_index = max(numeric_segments)
-            result = [None] * (max_index + 1)
-
-            # Fill in the list values
-            for pointer, path_parts in root_paths.items():
-                if path_parts and path_parts[0].isdigit():
-                    index = int(path_parts[0])
-                    remaining_path = path_parts[1:]
-
-                    if not remaining_path:
-                        # Direct value at this index
-                        result[index] = flat_dict[pointer]
-                    # Nested structure at this index
-                    elif result[index] is None:
-                        result[index] = _create_nested_structure(
-                            remaining_path, flat_dict[pointer]
-                        )
-                    else:
-                        _set_nested_value(
-                            result[index], remaining_path, flat_dict[pointer]
-                        )
-
-            return result
-    except (ValueError, AttributeError):
-        pass
+        return result
+
+    if has_root_value:
+        return root_value
 
     # Default to dict structure
     result = {}
-
-    for pointer, path_parts in root_paths.items():
-        value = flat_dict[pointer]
-        if not path_parts:
-            # Root level value - this represents the entire structure
-            return value
+    for path_parts, value in parsed:
         _set_nested_value(result, path_parts, value)
 
     return result
 
 
-def _parse_json_pointer(pointer: str) -> list[str]:
+def _root_index_key(
+    entry: tuple[tuple[tuple[str, int | None], ...], Any],
+) -> int:
+    """Order parsed pointers by their root list index.
+
+    Lexicographic pointer-string order would put "/10" before "/2"; this
+    key compares the pre-parsed integer instead. Deeper segments are
+    deliberately left out of the comparison.
+    """
+
+    path_parts, _ = entry
+    return path_parts[0][1]
+
+
+@lru_cache(maxsize=4096)
+def _parse_json_pointer(pointer: str) -> tuple[tuple[str, int | None], ...]:
     """
     Parse a JSON pointer into its component parts.
 
+    Each segment is converted to numeric form once here, so consumers
+    branch on the pre-parsed index instead of repeating isdigit()/int().
+    Session-state pointers repeat verbatim on every rerun, so the parse
+    is memoized; the tuple result is immutable and safe to share.
+
     Args:
         pointer: A JSON pointer string (e.g., "/details/hobbies/0" or "/")
 
     Returns:
-        List of path segments (e.g., ["details", "hobbies", "0"]) or empty list for root
+        Tuple of (segment, index) pairs where index is the integer value
+        for numeric segments and None otherwise; empty tuple for root
     """
     if not pointer or pointer[0] != "/":
-        return []
+        return ()
 
     # Remove leading slash and split by remaining slashes
     path = pointer[1:]
     if not path:
         # Root pointer "/"
-        return []
+        return ()
+
+    # Split by slash and unescape each segment; most segments carry no
+    # escapes, so gate the regex pass behind a cheap membership test.
+    parts: list[tuple[str, int | None]] = []
+    for raw_segment in path.split("/"):
+        if "~" in raw_segment:
+            segment = _POINTER_UNESCAPE_PATTERN.sub(
+                lambda match: _POINTER_UNESCAPE_MAP[match.group(0)], raw_segment
+            )
+        else:
+            segment = raw_segment
 
-    # Split by slash and unescape each segment
-    parts = []
-    for segment in path.split("/"):
-        # Unescape JSON pointer special characters
-        unescaped = segment.replace("~1", "/").replace("~0", "~")
-        parts.append(unescaped)
+        index: int | None = None
+        if segment.isdigit():
+            # isdigit() admits a few code points int() rejects (e.g.
+            # superscripts); treat those as plain keys.
+            try:
+                index = int(segment)
+            except ValueError:
+                index = None
+        parts.append((segment, index))
 
-    return parts
+    return tuple(parts)
 
 
 def _create_nested_structure(
-    path_parts: list[str], value: Any
+    path_parts: tuple[tuple[str, int | None], ...], value: Any
 ) -> dict[str, Any] | list[Any]:
     """
     Create a nested structure for the given path.
 
     Args:
-        path_parts: List of path segments
+        path_parts: List of (segment, index) pairs from _parse_json_pointer
         value: The value to place at the end of the path
 
     Returns:
@@ -210,63 +297,61 @@ def _create_nested_structure(
     if not path_parts:
         return value
 
-    first_part = path_parts[0]
-    remaining_parts = path_parts[1:]
+    # Wrap the value from the leaf outward; iterating right to left
+    # avoids one recursive frame and list slice per segment.
+    current = value
+    for part, index in reversed(path_parts):
+        # A numeric part indicates an array level
+        if index is not None:
+            container: list[Any] = [None] * (index + 1)
+            container[index] = current
+            current = container
+        else:
+            current = {part: current}
 
-    # Check if first part is a number (indicates array)
-    if first_part.isdigit():
-        index = int(first_part)
-        if not remaining_parts:
-            # End of path - create list with this single value
-            return [value] if index == 0 else [None] * index + [value]
-        # Nested structure - create list and recurse
-        result = [None] * (index + 1) if index > 0 else [None]
-        result[index] = _create_nested_structure(remaining_parts, value)
-        return result
-    # Dictionary structure
-    if not remaining_parts:
-        return {first_part: value}
-    return {first_part: _create_nested_structure(remaining_parts, value)}
+    return current
 
 
 def _set_nested_value(
-    obj: dict[str, Any] | list[Any], path_parts: list[str], value: Any
+    obj: dict[str, Any] | list[Any],
+    path_parts: tuple[tuple[str, int | None], ...],
+    value: Any,
 ) -> None:
     """
     Set a value in a nested structure following the given path.
 
     Args:
         obj: The object to modify (dict or list)
-        path_parts: List of path segments to follow
+        path_parts: List of (segment, index) pairs to follow
         value: The value to set
     """
     if not path_parts:
         return
 
-    first_part = path_parts[0]
+    first_part, first_index = path_parts[0]
     remaining_parts = path_parts[1:]
 
-    if isinstance(obj, list):
+    # Containers on this path are built internally, so they are always
+    # plain lists/dicts and an exact type check suffices.
+    if type(obj) is list:
         # For lists, first part should be an index
-        if first_part.isdigit():
-            index = int(first_part)
-            # Extend list if necessary
-            while len(obj) <= index:
-                obj.append(
-                    {} if remaining_parts and not remaining_parts[0].isdigit() else []
-                )
+        if first_index is not None:
+            # Extend list if necessary; one extend beats append-per-slot
+            missing = first_index + 1 - len(obj)
+            if missing > 0:
+                obj.extend([None] * missing)
 
             if not remaining_parts:
-                obj[index] = value
+                obj[first_index] = value
             else:
-                if obj[index] is None:
-                    obj[index] = {} if not remaining_parts[0].isdigit() else []
-                _set_nested_value(obj[index], remaining_parts, value)
+                if obj[first_index] is None:
+                    obj[first_index] = {} if remaining_parts[0][1] is None else []
+                _set_nested_value(obj[first_index], remaining_parts, value)
     else:
         # For dicts, first part is a key
         if first_part not in obj:
             obj[first_part] = (
-                {} if remaining_parts and not remaining_parts[0].isdigit() else []
+                {} if remaining_parts and remaining_parts[0][1] is None else []
             )
 
         if not remaining_parts:
@@ -275,49 +360,57 @@ def _set_nested_value(
             _set_nested_value(obj[first_part], remaining_parts, value)
 
 
-def read_uploaded_file_bytes(uploaded_file: Any) -> bytes:
-    """Read the raw bytes from a file-like object with helpful validation."""
+def read_uploaded_file_bytes(uploaded_file: Any) -> bytes | bytearray | memoryview:
+    """Read the raw bytes from a file-like object with helpful validation.
+
+    The returned value may be any bytes-like object; callers hand it to
+    buffer-protocol consumers (b64encode, np.frombuffer), so forcing a
+    bytes copy here would only duplicate multi-megabyte photo payloads.
+    """
 
     if uploaded_file is None:
         raise ValueError("No file provided")
 
-    if not hasattr(uploaded_file, "read"):
+    if hasattr(uploaded_file, "getvalue"):
+        # Streamlit's UploadedFile (and BytesIO) hand back their internal
+        # buffer without a read()/seek() round trip or cursor churn.
+        data = uploaded_file.getvalue()
+    elif hasattr(uploaded_file, "read"):
+        data = uploaded_file.read()
+
+        # Reset the cursor when possible to avoid surprising downstream
+        # behaviour.
+        if hasattr(uploaded_file, "seek"):
+            with contextlib.suppress(OSError, ValueError):
+                uploaded_file.seek(0)
+    else:
         raise TypeError("Uploaded file must provide a read() method")
 
-    data = uploaded_file.read()
-
-    # Reset the cursor when possible to avoid surprising downstream behaviour.
-    if hasattr(uploaded_file, "seek"):
-        with contextlib.suppress(OSError, ValueError):
-            uploaded_file.seek(0)
-
     if data is None:
         raise ValueError("Uploaded file produced no data")
 
     if isinstance(data, str):
         data = data.encode("utf-8")
-    elif isinstance(data, memoryview):
-        data = data.tobytes()
 
-    if not isinstance(data, bytes | bytearray):
+    if not isinstance(data, bytes | bytearray | memoryview):
         raise TypeError("Uploaded file data must be bytes-like")
 
     if not data:
         raise ValueError("Uploaded file is empty")
 
-    return bytes(data)
+    return data
 
 
 def uploaded_file_to_base64(uploaded_file: Any) -> str:
     """Return a base64-encoded representation of a file-like object."""
 
     data = read_uploaded_file_bytes(uploaded_file)
-    return base64.b64encode(data).decode("utf-8")
+    return b64encode(data).decode("ascii")
 
 
 _PHOTO_DATA_URI_PATTERN = re.compile(
     r"^data:image/(png|jpeg|jpg|gif|webp);base64,(?P<payload>[A-Za-z0-9+/=]+)$",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 
 _EXTENSION_TO_MIME = {
@@ -336,7 +429,9 @@ def is_valid_photo_data_uri(value: object) -> bool:
         return False
 
     stripped = value.strip()
-    if not stripped:
+    # Cheap prefix rejection before the O(n) full-string scan; only the
+    # first 11 characters are lowercased, not the whole base64 payload.
+    if not stripped[:11].lower().startswith("data:image/"):
         return False
 
     match = _PHOTO_DATA_URI_PATTERN.fullmatch(stripped)
@@ -344,7 +439,7 @@ def is_valid_photo_data_uri(value: object) -> bool:
         return False
 
     try:
-        base64.b64decode(match.group("payload"), validate=True)
+        b64decode(match.group("payload"), validate=True)
     except (binascii.Error, ValueError):
         return False
 
@@ -356,7 +451,7 @@ def photo_data_uri_to_bytes(value: str) -> bytes:
     if not match:
         raise ValueError("Invalid photo data URI")
 
-    return base64.b64decode(match.group("payload"), validate=True)
+    return b64decode(match.group("payload"), validate=True)
 
 
 def guess_image_mime_type(uploaded_file: st.UploadedFile) -> str | None: